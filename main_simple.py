@@ -12,13 +12,15 @@ from upe.routes import router as upe_router
 
 app = FastAPI(title="YAFA UPE System", version="1.0.0")
 
-# Add CORS middleware
+# Add CORS middleware; set CORS_ORIGINS (comma-separated) in production
+ALLOWED_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,  # let browsers cache preflight responses for a day
 )
 
 # Include UPE router
@@ -37,4 +39,7 @@ async def health():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Multiple workers need the app as an import string; uvloop/httptools ship with uvicorn[standard]
+    workers = int(os.getenv("WEB_CONCURRENCY", "0")) or (os.cpu_count() or 1) * 2 + 1
+    uvicorn.run("main_simple:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools",
+                workers=workers, access_log=False)
@@ -0,0 +1,130 @@
+
+from __future__ import annotations
+import json, types
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from upe import routes
+from upe.llm_cache import LLMCache
+
+GOOD_SECTIONS = [
+    {"id": "s1", "heading": "One", "blocks": [{"type": "text", "content": "hello"}]},
+    {"id": "s2", "heading": "Two", "blocks": [{"type": "list", "items": ["a", "b"]}]},
+]
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    # /upe routes with the committee answering `api.model_json`; no network, no shared cache
+    monkeypatch.setattr(routes, "BASE", str(tmp_path))
+    monkeypatch.setattr(routes, "_llm_cache", LLMCache())
+    monkeypatch.setattr(routes, "_get_client", lambda: None)
+    app = FastAPI()
+    app.include_router(routes.router)
+    with TestClient(app) as c:
+        c.model_json = {"title": "T", "sections": GOOD_SECTIONS}
+        async def fake_llm_json(*args, **kwargs):
+            return c.model_json
+        monkeypatch.setattr(routes, "_llm_json", fake_llm_json)
+        yield c
+
+def _compile(api, primary="html", mode="turbo", **extra):
+    return api.post("/upe/compile", json={"v": "1.0.0", "goal": "g", "mode": mode, "seed": 1,
+                                          "artifact": {"primary": primary}, **extra})
+
+@pytest.mark.parametrize("block", [
+    {"type": "list", "content": "a, b"},
+    {"type": "text", "content": ["x"]},
+    {"type": "table", "rows": [[1, 2]]},
+    {"type": "text", "content": None},
+    "not a block",
+])
+def test_malformed_blocks_are_rejected(api, block):
+    api.model_json = {"title": "T", "sections": [{"id": "s1", "heading": "H", "blocks": [block]}, *GOOD_SECTIONS]}
+    r = _compile(api)
+    assert r.status_code == 422
+    assert "schema validation" in r.json()["detail"]
+
+def test_well_formed_output_compiles(api):
+    r = _compile(api)
+    assert r.status_code == 200
+    assert r.json()["status"] == "OK"
+
+def test_feedback_on_failed_background_run_conflicts(api):
+    # md has no renderer, so the detached run fails after the 202
+    r = _compile(api, primary="md", background=True)
+    assert r.status_code == 202
+    run_id = r.json()["manifestId"]
+    assert api.get(f"/upe/runs/{run_id}").json()["status"] == "failed"
+    f = api.post(f"/upe/runs/{run_id}/feedback", json={"runId": run_id, "ops": [{"op": "focus", "topic": "x"}]})
+    assert f.status_code == 409
+
+@pytest.mark.parametrize("mode", ["turbo", "proof"])
+def test_null_citations_and_sections_do_not_crash_scoring(api, mode):
+    api.model_json = {"title": "T", "sections": GOOD_SECTIONS, "citations": None}
+    assert _compile(api, mode=mode).status_code == 200
+    # null sections score zero and transform to an empty document
+    api.model_json = {"title": "T", "sections": None}
+    assert _compile(api, mode=mode).status_code == 200
+
+def test_unwritable_llm_cache_does_not_fail_the_run(api, tmp_path, monkeypatch):
+    blocker = tmp_path / "cache-file"
+    blocker.write_text("")
+    monkeypatch.setattr(routes, "_llm_cache", LLMCache(directory=str(blocker)))
+    r = _compile(api, mode="mentor")  # mentor's first candidate (t=0.2) is persisted
+    assert r.status_code == 200
+    # the failed write must not turn that paid answer into a TOOL_ERROR candidate
+    committee = api.get(f"/upe/runs/{r.json()['manifestId']}").json()["committee"]
+    assert [c["score"] for c in committee] == [0.5, 0.5, 0.5]
+
+def test_disk_cache_is_keyed_on_the_system_prompt(api, tmp_path, monkeypatch):
+    calls = []
+    async def counting_llm_json(*args, **kwargs):
+        calls.append(args)
+        return api.model_json
+    monkeypatch.setattr(routes, "_llm_json", counting_llm_json)
+    cache_dir = str(tmp_path / "llm_cache")
+
+    def run_in_fresh_worker():
+        # a new LLMCache over the same directory stands in for a restarted worker
+        monkeypatch.setattr(routes, "_llm_cache", LLMCache(directory=cache_dir))
+        calls.clear()
+        assert _compile(api, mode="mentor").status_code == 200
+        return len(calls)
+
+    assert run_in_fresh_worker() == 3
+    assert run_in_fresh_worker() == 2  # the t=0.2 candidate replays from disk
+    monkeypatch.setattr(routes, "_RUBRIC", routes._RUBRIC + "\n- Brevity (0%)")
+    assert run_in_fresh_worker() == 3
+
+def test_batch_run_records_its_job_on_the_pending_manifest(api, tmp_path, monkeypatch):
+    seen = []
+    class Files:
+        async def create(self, file, purpose):
+            self.input = file[1]
+            return types.SimpleNamespace(id="file-in")
+        async def content(self, file_id):
+            rows = [{"custom_id": json.loads(line)["custom_id"],
+                     "response": {"status_code": 200, "body": {"choices": [
+                         {"message": {"content": json.dumps(api.model_json)}}]}}}
+                    for line in self.input.split(b"\n")]
+            return types.SimpleNamespace(text="\n".join(map(json.dumps, rows)))
+    class Batches:
+        async def create(self, **kwargs):
+            return types.SimpleNamespace(id="batch-1", status="validating", output_file_id=None)
+        async def retrieve(self, batch_id):
+            # what a restarted worker would find on disk while the job runs
+            seen.extend(orjson.loads(p.read_bytes()) for p in tmp_path.glob("*/manifest.json"))
+            return types.SimpleNamespace(id=batch_id, status="completed", output_file_id="file-out")
+    monkeypatch.setattr(routes, "_get_client", lambda: types.SimpleNamespace(files=Files(), batches=Batches()))
+    monkeypatch.setattr(routes, "BATCH_POLL_S", 0)
+    monkeypatch.setitem(routes.gearProfiles["mentor"], "useBatch", True)
+
+    r = _compile(api, mode="mentor")
+    assert r.status_code == 202
+    assert [m["status"] for m in seen] == ["pending"]
+    batch = seen[0]["batch"]
+    assert (batch["id"], batch["inputFileId"]) == ("batch-1", "file-in")
+    assert [j["customId"] for j in batch["jobs"]] == ["C0", "C1", "C2"]
+    done = api.get(f"/upe/runs/{r.json()['manifestId']}").json()
+    assert done["status"] == "completed" and done["batch"]["id"] == "batch-1"
@@ -0,0 +1,47 @@
+
+from __future__ import annotations
+import asyncio, os, time
+import orjson
+from upe.llm_cache import LLMCache
+
+def test_disk_entries_expire(tmp_path):
+    LLMCache(directory=str(tmp_path), disk_ttl=60).set("m", "p", 0.0, {"a": 1}, seed=1)
+    [path] = tmp_path.glob("*.json")
+    # A fresh process (empty memory tier) replays the entry while it is within disk_ttl
+    assert LLMCache(directory=str(tmp_path), disk_ttl=60).get("m", "p", 0.0, seed=1) == {"a": 1}
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    assert LLMCache(directory=str(tmp_path), disk_ttl=60).get("m", "p", 0.0, seed=1) is None
+    assert not path.exists()
+
+def test_disk_directory_is_bounded(tmp_path):
+    cache = LLMCache(directory=str(tmp_path))
+    for i in range(6):
+        cache.set("m", f"p{i}", 0.0, {"i": i})
+    cache.prune_disk()  # under the default bound; also waits out the sweep the first write started
+    now = time.time()
+    for path in tmp_path.glob("*.json"):
+        os.utime(path, (now - 100 + orjson.loads(path.read_bytes())["i"],) * 2)  # p0 oldest
+    cache.disk_maxsize = 3
+    cache.prune_disk()
+    assert sorted(orjson.loads(p.read_bytes())["i"] for p in tmp_path.glob("*.json")) == [3, 4, 5]
+
+def test_unwritable_directory_only_disables_the_disk_tier(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    cache = LLMCache(directory=str(blocker))
+    cache.set("m", "p", 0.0, {"a": 1})
+    assert cache.get("m", "p", 0.0) == {"a": 1}
+    asyncio.run(cache.aset("m", "q", 0.0, {"b": 2}))
+    assert cache.get("m", "q", 0.0) == {"b": 2}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["not-a-dir"]
+
+def test_semantic_tier_is_bounded_across_scopes():
+    cache = LLMCache(semantic_maxsize=50)
+    for i in range(500):
+        cache.set("m", f"p{i}", 0.9, {"i": i}, embedding=[1.0, 0.0], scope=f"s{i}")
+    assert len(cache._semantic) == 50
+    # an identical embedding only matches within its own scope, and old scopes are evicted
+    assert cache.get("m", "other", 0.9, embedding=[1.0, 0.0], scope="s499") == {"i": 499}
+    assert cache.get("m", "other", 0.9, embedding=[1.0, 0.0], scope="s0") is None
+    assert cache.get("m", "other", 0.9, embedding=[1.0, 0.0], scope="never-written") is None
@@ -0,0 +1,26 @@
+
+from __future__ import annotations
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from upe import routes
+
+def test_compile_request_body_refs_resolve():
+    app = FastAPI()
+    app.include_router(routes.router)
+    spec = app.openapi()
+    body = spec["paths"]["/upe/compile"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+    assert body == {"$ref": "#/components/schemas/PabiInput"}
+    refs = {v for v in json.dumps(spec).split('"') if v.startswith("#/")}
+    assert refs and all(r.startswith("#/components/schemas/") and r.rsplit("/", 1)[1] in spec["components"]["schemas"]
+                        for r in refs)
+
+def test_compile_422_matches_the_other_routes():
+    app = FastAPI()
+    app.include_router(routes.router)
+    bad = {"v": "1.0.0", "goal": "g", "mode": "turbo", "artifact": {"primary": "nope"}}
+    with TestClient(app) as c:
+        compile_err = c.post("/upe/compile", json=bad)
+        stream_err = c.post("/upe/compile/stream", json=bad)
+    assert compile_err.status_code == stream_err.status_code == 422
+    assert compile_err.json() == stream_err.json()
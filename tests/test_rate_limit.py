@@ -0,0 +1,41 @@
+
+from __future__ import annotations
+import asyncio
+import httpx
+import pytest
+from openai import AsyncOpenAI, RateLimitError
+from upe.rate_limit import RateLimitedClient
+
+COMPLETION = {"id": "c", "object": "chat.completion", "created": 0, "model": "m",
+              "choices": [{"index": 0, "finish_reason": "stop",
+                           "message": {"role": "assistant", "content": "{}"}}]}
+
+def _client(responses):
+    # Real SDK client over a mock transport; the SDK keeps its default retries on purpose
+    attempts = []
+    def handler(request):
+        attempts.append(request)
+        return responses[min(len(attempts), len(responses)) - 1]
+    sdk = AsyncOpenAI(api_key="sk-test", max_retries=2,
+                      http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return RateLimitedClient(sdk, max_retries=4, backoff_s=0), attempts
+
+def _call(client):
+    return asyncio.run(client.chat_completion(model="m", messages=[{"role": "user", "content": "hi"}]))
+
+def test_persistent_429_is_retried_in_one_layer_only():
+    client, attempts = _client([httpx.Response(429, json={"error": {"message": "slow down"}})])
+    with pytest.raises(RateLimitError):
+        _call(client)
+    assert len(attempts) == 5  # first try + max_retries, no SDK retries stacked underneath
+
+def test_recovers_after_transient_errors_and_reads_budget():
+    client, attempts = _client([
+        httpx.Response(429, json={"error": {"message": "slow down"}}),
+        httpx.Response(500, json={"error": {"message": "oops"}}),
+        httpx.Response(200, json=COMPLETION, headers={"x-ratelimit-remaining-requests": "7",
+                                                      "x-ratelimit-reset-requests": "1s"}),
+    ])
+    assert _call(client).choices[0].message.content == "{}"
+    assert len(attempts) == 3
+    assert client._requests.remaining == 7
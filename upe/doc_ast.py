@@ -1,32 +1,36 @@
 
 from __future__ import annotations
-from typing import List, Literal, Optional, Any
+from typing import List, Literal, Optional, Any, Union
+from typing_extensions import Annotated, NotRequired, TypedDict
 from pydantic import BaseModel, Field, ConfigDict
 
-class Claim(BaseModel):
+# Leaf nodes are plain TypedDicts: they are validated once at the Doc boundary
+# and then read as dicts by the renderers, without per-instance model overhead.
+
+class Claim(TypedDict):
     id: str
     text: str
-    sourceId: Optional[str] = None
-    confidence: Optional[float] = None
+    sourceId: NotRequired[Optional[str]]
+    confidence: NotRequired[Optional[float]]
 
-class Para(BaseModel):
-    kind: Literal["para"] = "para"
+class Para(TypedDict):
+    kind: Literal["para"]
     text: str
-    claims: Optional[List[Claim]] = None
+    claims: NotRequired[Optional[List[Claim]]]
 
-class ListBlock(BaseModel):
-    kind: Literal["list"] = "list"
+class ListBlock(TypedDict):
+    kind: Literal["list"]
     items: List[str]
 
-class Table(BaseModel):
-    kind: Literal["table"] = "table"
+class Table(TypedDict):
+    kind: Literal["table"]
     rows: List[List[str]]
 
-class Chart(BaseModel):
-    kind: Literal["chart"] = "chart"
+class Chart(TypedDict):
+    kind: Literal["chart"]
     spec: Any
 
-Block = Para | ListBlock | Table | Chart
+Block = Annotated[Union[Para, ListBlock, Table, Chart], Field(discriminator="kind")]
 
 class Section(BaseModel):
     id: str
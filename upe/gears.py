@@ -14,6 +14,7 @@ class GearProfile(TypedDict, total=False):
     minCites: int
     rubricMin: float
     triangulate: bool
+    useBatch: bool  # submit the committee through the OpenAI Batch API (minutes, half price)
 
 gearProfiles: dict[str, GearProfile] = {
     "turbo":  {"k":1, "temps":[0.3],        "reflect":0, "ragTopK":6,  "web":False, "coach":False, "proofGate":False, "latencyMs":6000},
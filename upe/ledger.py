@@ -1,9 +1,9 @@
 
 from __future__ import annotations
-from pydantic import BaseModel
+import msgspec
 from typing import List, Optional, Dict, Any
 
-class Ledger(BaseModel):
+class Ledger(msgspec.Struct, kw_only=True):
     candidates: List[Dict[str, Any]]
     winnerId: str
     rationale: List[str]
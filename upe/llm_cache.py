@@ -0,0 +1,220 @@
+
+from __future__ import annotations
+import asyncio, hashlib, json, logging, os, threading, time
+import orjson
+from typing import Any, Dict, List, Optional, Sequence
+from cachetools import TTLCache
+
+# Temperatures at or below this are treated as reproducible for a fixed seed,
+# so their responses may be replayed from the exact-match tier.
+DETERMINISTIC_MAX_TEMP = 0.3
+# Only near-greedy calls are persisted to disk, where they outlive the process
+PERSIST_MAX_TEMP = 0.2
+# The directory is swept for expired and excess files after this many disk writes
+_PRUNE_EVERY = 256
+
+log = logging.getLogger(__name__)
+
+def cache_key(model: str, prompt: Any, temperature: float, seed: Optional[int] = None) -> str:
+    payload = json.dumps({"model": model, "prompt": prompt, "temperature": temperature, "seed": seed},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class _SemanticIndex:
+    # One matrix of normalized embeddings shared by every scope, so maxsize and ttl bound
+    # the whole tier; each row carries its scope key and a lookup only matches its own scope
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize, self.ttl = maxsize, ttl
+        self.matrix = None
+        self.scopes: List[str] = []
+        self.values: List[Dict[str, Any]] = []
+        self.expires: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _prune(self, now: float) -> None:
+        keep = [i for i, exp in enumerate(self.expires) if exp > now][-self.maxsize:]
+        if len(keep) == len(self.values):
+            return
+        self.scopes = [self.scopes[i] for i in keep]
+        self.values = [self.values[i] for i in keep]
+        self.expires = [self.expires[i] for i in keep]
+        self.matrix = self.matrix[keep] if keep else None
+
+    def get(self, vec, scope: str, threshold: float) -> Optional[Dict[str, Any]]:
+        import numpy as np
+        self._prune(time.monotonic())
+        if self.matrix is None:
+            return None
+        in_scope = np.fromiter((s == scope for s in self.scopes), dtype=bool, count=len(self.scopes))
+        if not in_scope.any():
+            return None
+        sims = np.where(in_scope, self.matrix @ vec, -np.inf)
+        best = int(sims.argmax())
+        return self.values[best] if sims[best] >= threshold else None
+
+    def add(self, vec, scope: str, value: Dict[str, Any]) -> None:
+        import numpy as np
+        now = time.monotonic()
+        self.matrix = vec[None, :] if self.matrix is None else np.vstack([self.matrix, vec])
+        self.scopes.append(scope)
+        self.values.append(value)
+        self.expires.append(now + self.ttl)
+        self._prune(now)
+
+class LLMCache:
+    """Two-tier cache for parsed LLM JSON responses.
+
+    The exact tier replays deterministic calls (same model, prompt, seed and a
+    temperature <= DETERMINISTIC_MAX_TEMP). Given a directory, entries at or
+    below PERSIST_MAX_TEMP are also written there as {key}.json and survive
+    restarts for up to disk_ttl seconds (judged by file mtime, so a model alias
+    that moves to a new snapshot stops replaying old answers); the directory is
+    capped at disk_maxsize files, oldest evicted first. The semantic tier is
+    only used when the caller supplies an embedding and matches near-identical
+    prompts within a scope by cosine similarity; it holds at most
+    semantic_maxsize entries across all scopes, each for semantic_ttl seconds.
+    Returned dicts are shared; treat them as read-only.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600, semantic_maxsize: int = 1_000,
+                 semantic_ttl: float = 600, threshold: float = 0.92, directory: Optional[str] = None,
+                 disk_ttl: float = 86_400, disk_maxsize: int = 10_000):
+        self._exact: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.directory = directory
+        self.disk_ttl, self.disk_maxsize = disk_ttl, disk_maxsize
+        self._disk_writes = 0
+        self._pruning = threading.Lock()
+        self._semantic = _SemanticIndex(semantic_maxsize, semantic_ttl)
+        self.threshold = threshold
+
+    def _disk_get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, f"{key}.json")
+        try:
+            with open(path, "rb") as f:
+                if time.time() - os.fstat(f.fileno()).st_mtime <= self.disk_ttl:
+                    return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+        self._unlink(path)  # expired; removed after the handle is closed
+        return None
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def prune_disk(self) -> None:
+        """Synchronously drop expired entries, then the oldest ones beyond disk_maxsize.
+
+        Waits for a background sweep already in progress.
+        """
+        if self.directory is None:
+            return
+        with self._pruning:
+            self._sweep_disk()
+
+    def _disk_prune(self) -> None:
+        # Background sweep; _disk_set acquired _pruning before starting the thread
+        try:
+            self._sweep_disk()
+        finally:
+            self._pruning.release()
+
+    def _sweep_disk(self) -> None:
+        cutoff = time.time() - self.disk_ttl
+        live = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        mtime = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    if mtime < cutoff:
+                        self._unlink(entry.path)
+                    else:
+                        live.append((mtime, entry.path))
+        except OSError:
+            return
+        if len(live) > self.disk_maxsize:
+            live.sort()
+            for _, path in live[:len(live) - self.disk_maxsize]:
+                self._unlink(path)
+
+    def _disk_set(self, key: str, value: Dict[str, Any]) -> None:
+        # Best-effort like _disk_get: a full or unwritable directory only costs the disk tier
+        path = os.path.join(self.directory, f"{key}.json")
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(orjson.dumps(value))
+            os.replace(tmp, path)  # readers in other workers never see a partial file
+        except OSError as e:
+            log.warning("llm cache: could not persist %s: %s", key, e)
+            self._unlink(tmp)
+            return
+        # Sweep on the first write and every _PRUNE_EVERY after, on a daemon thread so a
+        # large directory never stalls the caller's event loop
+        due = self._disk_writes % _PRUNE_EVERY == 0
+        self._disk_writes += 1
+        if due and self._pruning.acquire(blocking=False):
+            threading.Thread(target=self._disk_prune, daemon=True).start()
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]):
+        import numpy as np
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    def get(self, model: str, prompt: Any, temperature: float, *, seed: Optional[int] = None,
+            embedding: Optional[Sequence[float]] = None, scope: str = "") -> Optional[Dict[str, Any]]:
+        if temperature <= DETERMINISTIC_MAX_TEMP:
+            key = cache_key(model, prompt, temperature, seed)
+            hit = self._exact.get(key)
+            if hit is None and self.directory and temperature <= PERSIST_MAX_TEMP:
+                hit = self._disk_get(key)
+                if hit is not None:
+                    self._exact[key] = hit
+            if hit is not None:
+                return hit
+        if embedding is not None:
+            vec = self._unit(embedding)
+            if vec is not None:
+                return self._semantic.get(vec, cache_key(model, scope, temperature), self.threshold)
+        return None
+
+    def _set_memory(self, model: str, prompt: Any, temperature: float, value: Dict[str, Any],
+                    seed: Optional[int], embedding: Optional[Sequence[float]], scope: str) -> Optional[str]:
+        # Fills the in-memory tiers; returns the key when the value should also go to disk
+        persist = None
+        if temperature <= DETERMINISTIC_MAX_TEMP:
+            key = cache_key(model, prompt, temperature, seed)
+            self._exact[key] = value
+            if self.directory and temperature <= PERSIST_MAX_TEMP:
+                persist = key
+        if embedding is not None:
+            vec = self._unit(embedding)
+            if vec is not None:
+                self._semantic.add(vec, cache_key(model, scope, temperature), value)
+        return persist
+
+    def set(self, model: str, prompt: Any, temperature: float, value: Dict[str, Any], *,
+            seed: Optional[int] = None, embedding: Optional[Sequence[float]] = None, scope: str = "") -> None:
+        key = self._set_memory(model, prompt, temperature, value, seed, embedding, scope)
+        if key is not None:
+            self._disk_set(key, value)
+
+    async def aset(self, model: str, prompt: Any, temperature: float, value: Dict[str, Any], *,
+                   seed: Optional[int] = None, embedding: Optional[Sequence[float]] = None, scope: str = "") -> None:
+        # Same as set(), but the disk write runs in a worker thread; memory tiers stay on the caller's loop
+        key = self._set_memory(model, prompt, temperature, value, seed, embedding, scope)
+        if key is not None:
+            await asyncio.to_thread(self._disk_set, key, value)
@@ -1,16 +1,19 @@
 
 from __future__ import annotations
-from pydantic import BaseModel, Field
+import msgspec
 from typing import Optional, List, Dict, Any
 
-class ArtifactMeta(BaseModel):
+# Internal run records are msgspec Structs: decoding a manifest validates types in
+# one pass with no model overhead. Pydantic stays on the API boundary (upe.pabi).
+
+class ArtifactMeta(msgspec.Struct, frozen=True):
     kind: str
     path: str
     bytes: int
     sha256: str
     primary: bool = False
 
-class RunManifest(BaseModel):
+class RunManifest(msgspec.Struct, kw_only=True):
     id: str
     parentId: Optional[str] = None
     createdAt: str
@@ -24,3 +27,4 @@ class RunManifest(BaseModel):
     timings: Dict[str, float]
     status: str
     error: Optional[Dict[str, Any]] = None
+    batch: Optional[Dict[str, Any]] = None  # Batch API job behind the committee, for resume/reconcile
@@ -2,6 +2,7 @@
 from __future__ import annotations
 from pydantic import BaseModel, Field, conlist, ConfigDict
 from typing import Literal, Optional, Dict, List, Any
+from typing_extensions import Annotated, NotRequired, TypedDict
 
 Mode = Literal["turbo","mentor","proof"]
 ArtifactKind = Literal["pptx","xlsx","docx","pdf","md","html","react_app","api_code","script"]
@@ -22,20 +23,21 @@ class PabiInput(BaseModel):
     seed: Optional[int] = None
     quality: Optional[Literal["fast","balanced","t_inf"]] = None
     artifact: ArtifactRequest
+    background: bool = False  # return 202 + PENDING and finish the run detached
 
-class Evidence(BaseModel):
+class Evidence(TypedDict):
     id: str
     source_id: str
     quote: str
-    confidence: float = Field(ge=0, le=1)
+    confidence: Annotated[float, Field(ge=0, le=1)]
 
-class FollowupSuggestion(BaseModel):
+class FollowupSuggestion(TypedDict):
     id: str
     label: str
     rationale: str
     action: Dict[str, Any]
     impact: List[Literal["quality","latency","safety","accuracy","cost","format","automation"]]
-    previewDiff: Optional[List[Dict[str, Any]]] = None
+    previewDiff: NotRequired[Optional[List[Dict[str, Any]]]]
 
 class PabiOutput(BaseModel):
     model_config = ConfigDict(extra="forbid")
@@ -46,4 +48,4 @@ class PabiOutput(BaseModel):
     model: str
     cartridge: str
     proof: Optional[Dict[str, Any]] = None
-    status: Literal["OK","INSUFFICIENT_CONTEXT","POLICY_BLOCK","TOOL_ERROR"]
+    status: Literal["OK","INSUFFICIENT_CONTEXT","POLICY_BLOCK","TOOL_ERROR","PENDING"]
@@ -1,18 +1,35 @@
 
 from __future__ import annotations
+from functools import lru_cache
 
-def compile_prompt_bom(*, run_id:str, cartridge_version:str, seed:int, model:str, temp:float,
-                       role:str, goal:str, context:str, style:str, banlist:list[str],
-                       tools_json:str, rubric:str, output_schema:str, failure_json:str) -> str:
+@lru_cache(maxsize=64)
+def _static_prefix(role:str, style:str, banlist:tuple[str, ...], tools_json:str, rubric:str,
+                   output_schema:str, failure_json:str) -> str:
+    # Everything that is identical across runs of a cartridge; sent as the system
+    # message so the provider's prompt-prefix cache can reuse it.
     parts = []
-    parts.append(f"[HEADER] Prompt-ID:{run_id} Version:{cartridge_version} Seed:{seed} Model:{model} t={temp}")
     parts.append(f"[ROLE] You are {role}. Do not reveal chain-of-thought. Follow policy; obey schema.")
-    parts.append(f"[OBJECTIVE] {goal}")
-    parts.append(f"[CONTEXT] {context}")
     parts.append(f"[STYLE & GLOSSARY] {style} | Avoid: {', '.join(banlist)}")
     parts.append(f"[TOOLS] {tools_json}")
     parts.append(f"[ACCEPTANCE RUBRIC]\n{rubric}")
     parts.append(f"[OUTPUT SCHEMA]\n{output_schema}")
     parts.append(f"[FAILURE JSON]\n{failure_json}")
-    parts.append(f"[RETURN INSTRUCTIONS] Return only JSON conforming to schema. No prose. </END>")
     return "\n\n".join(parts)
+
+# Per-request content, sent as the user message; parsed once, filled with format_map per call
+_DYNAMIC_TAIL = "\n\n".join([
+    "[HEADER] Prompt-ID:{run_id} Version:{cartridge_version} Seed:{seed} Model:{model} t={temp}",
+    "[OBJECTIVE] {goal}",
+    "[CONTEXT] {context}",
+    "[RETURN INSTRUCTIONS] Return only JSON conforming to schema. No prose. </END>",
+])
+
+def compile_prompt_bom(*, run_id:str, cartridge_version:str, seed:int, model:str, temp:float,
+                       role:str, goal:str, context:str, style:str, banlist:list[str],
+                       tools_json:str, rubric:str, output_schema:str, failure_json:str) -> tuple[str,str]:
+    # Returns (system, user); "\n\n".join() of the pair is the full BOM text
+    static = _static_prefix(role, style, tuple(banlist), tools_json, rubric, output_schema, failure_json)
+    return static, _DYNAMIC_TAIL.format_map({
+        "run_id": run_id, "cartridge_version": cartridge_version, "seed": seed, "model": model,
+        "temp": temp, "goal": goal, "context": context,
+    })
@@ -0,0 +1,95 @@
+
+from __future__ import annotations
+import asyncio, random, re, time
+from typing import Any, Mapping, Optional
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_S = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def _parse_reset(value: Optional[str]) -> float:
+    # OpenAI reports resets as Go-style durations, e.g. "1s", "6m0s", "20ms"
+    if not value:
+        return 0.0
+    return sum(float(n) * _UNIT_S[u] for n, u in _DURATION.findall(value))
+
+class _Bucket:
+    # Last reported remaining budget for one limit (requests or tokens) and when it refills
+    def __init__(self) -> None:
+        self.remaining: Optional[int] = None
+        self.resets_at = 0.0
+
+    def update(self, remaining: Optional[str], reset: Optional[str]) -> None:
+        if remaining is None:
+            return
+        try:
+            self.remaining = int(remaining)
+        except ValueError:
+            return
+        self.resets_at = time.monotonic() + _parse_reset(reset)
+
+    def delay(self, cost: int) -> float:
+        if self.remaining is None or self.remaining >= cost:
+            return 0.0
+        return max(0.0, self.resets_at - time.monotonic())
+
+    def spend(self, cost: int) -> None:
+        # Optimistic local debit until the next response reports the real figure
+        if self.remaining is not None:
+            self.remaining -= cost
+
+class RateLimitedClient:
+    """AsyncOpenAI wrapper that paces chat completions against the account's limits.
+
+    Concurrency is capped by a semaphore; request and token budgets come from the
+    x-ratelimit-* headers of earlier responses, and a call waits for the reset
+    when the budget would not cover it. This is the only retry layer for chat
+    completions (the SDK's own retries are disabled for them): 429s, 5xx and
+    connection errors are retried with jittered exponential backoff. Other
+    attributes (files, batches, embeddings, ...) pass through to the wrapped
+    client and keep its retry settings.
+    """
+
+    def __init__(self, client: AsyncOpenAI, max_concurrent: int = 16, max_retries: int = 4,
+                 backoff_s: float = 1.0, max_backoff_s: float = 30.0):
+        self._client = client
+        self._chat = client.with_options(max_retries=0).chat.completions
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._requests, self._tokens = _Bucket(), _Bucket()
+        self.max_retries, self.backoff_s, self.max_backoff_s = max_retries, backoff_s, max_backoff_s
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    @staticmethod
+    def _estimate_tokens(kwargs: Mapping[str, Any]) -> int:
+        # ~4 characters per token, plus whatever completion budget the call reserves
+        chars = sum(len(m.get("content") or "") for m in kwargs.get("messages", []))
+        return chars // 4 + int(kwargs.get("max_tokens") or 0)
+
+    def _observe(self, headers: Mapping[str, str]) -> None:
+        self._requests.update(headers.get("x-ratelimit-remaining-requests"), headers.get("x-ratelimit-reset-requests"))
+        self._tokens.update(headers.get("x-ratelimit-remaining-tokens"), headers.get("x-ratelimit-reset-tokens"))
+
+    async def chat_completion(self, **kwargs: Any) -> Any:
+        cost = self._estimate_tokens(kwargs)
+        attempt = 0
+        async with self._slots:
+            while True:
+                wait = max(self._requests.delay(1), self._tokens.delay(cost))
+                if wait:
+                    await asyncio.sleep(wait)
+                self._requests.spend(1); self._tokens.spend(cost)
+                try:
+                    raw = await self._chat.with_raw_response.create(**kwargs)
+                except (RateLimitError, InternalServerError, APIConnectionError) as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = min(self.max_backoff_s, self.backoff_s * 2 ** attempt)
+                    if isinstance(e, RateLimitError):
+                        self._observe(e.response.headers)
+                    await asyncio.sleep(delay * (0.5 + random.random() / 2))
+                    attempt += 1
+                    continue
+                self._observe(raw.headers)
+                return raw.parse()
@@ -1,20 +1,39 @@
 
 from __future__ import annotations
+from html import escape
+from typing import BinaryIO, Iterator
 from upe.doc_ast import Doc
 
-def render_html(doc: Doc) -> str:
-    from html import escape
-    html = [f"<html><head><meta charset='utf-8'><title>{escape(doc.title)}</title></head><body>"]
-    html.append(f"<h1>{escape(doc.title)}</h1>")
+def iter_html(doc: Doc) -> Iterator[str]:
+    # Yields the document one section at a time
+    title = escape(doc.title)
+    yield f"<html><head><meta charset='utf-8'><title>{title}</title></head><body>\n<h1>{title}</h1>\n"
     for sec in doc.sections:
-        html.append(f"<h2>{escape(sec.heading)}</h2>")
+        parts = [f"<h2>{escape(sec.heading)}</h2>\n"]
+        append = parts.append
         for block in sec.blocks:
-            if block.kind == "para":
-                html.append(f"<p>{escape(block.text)}</p>")
-            elif block.kind == "list":
-                html.append("<ul>")
-                for item in block.items:
-                    html.append(f"<li>{escape(item)}</li>")
-                html.append("</ul>")
-    html.append("</body></html>")
-    return "\n".join(html)
+            kind = block["kind"]
+            if kind == "para":
+                append("<p>"); append(escape(block["text"])); append("</p>\n")
+            elif kind == "list":
+                append("<ul>\n")
+                for item in block["items"]:
+                    append("<li>"); append(escape(item)); append("</li>\n")
+                append("</ul>\n")
+        yield "".join(parts)
+    yield "</body></html>"
+
+def render_html(doc: Doc) -> str:
+    return "".join(iter_html(doc))
+
+def iter_html_bytes(doc: Doc) -> Iterator[bytes]:
+    for chunk in iter_html(doc):
+        yield chunk.encode("utf-8")
+
+def write_html(doc: Doc, out_path: str | BinaryIO) -> None:
+    # Encodes and writes section by section, so only one section is held as bytes at a time
+    if not isinstance(out_path, str):
+        out_path.writelines(iter_html_bytes(doc))
+        return
+    with open(out_path, "wb") as f:
+        f.writelines(iter_html_bytes(doc))
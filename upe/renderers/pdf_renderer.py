@@ -1,11 +1,12 @@
 
 from __future__ import annotations
-from reportlab.lib.pagesizes import LETTER
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
+from typing import BinaryIO
 from upe.doc_ast import Doc
 
-def render_pdf(doc: Doc, out_path: str) -> None:
+def render_pdf(doc: Doc, out_path: str | BinaryIO) -> None:
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import inch
     c = canvas.Canvas(out_path, pagesize=LETTER)
     width, height = LETTER
     y = height - 1*inch
@@ -21,12 +22,12 @@ def render_pdf(doc: Doc, out_path: str) -> None:
         c.drawString(1*inch, y, sec.heading); y -= 0.3*inch
         c.setFont("Helvetica", 11)
         for block in sec.blocks:
-            if block.kind == "para":
-                for line in block.text.split("\n"):
+            if block["kind"] == "para":
+                for line in block["text"].split("\n"):
                     if y < 1*inch: c.showPage(); y = height - 1*inch
                     c.drawString(1*inch, y, line); y -= 0.22*inch
-            elif block.kind == "list":
-                for item in block.items:
+            elif block["kind"] == "list":
+                for item in block["items"]:
                     if y < 1*inch: c.showPage(); y = height - 1*inch
                     c.drawString(1*inch, y, f"• {item}"); y -= 0.22*inch
     c.showPage()
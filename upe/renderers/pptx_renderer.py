@@ -1,11 +1,11 @@
 
 from __future__ import annotations
-from typing import Tuple
-from pptx import Presentation
-from pptx.util import Pt
+from typing import BinaryIO, Tuple
 from upe.doc_ast import Doc
 
-def render_pptx(doc: Doc, out_path: str, slide_count_hint: int | None = None) -> None:
+def render_pptx(doc: Doc, out_path: str | BinaryIO, slide_count_hint: int | None = None) -> None:
+    from pptx import Presentation
+    from pptx.util import Pt
     prs = Presentation()
     # Title slide
     title_slide_layout = prs.slide_layouts[0]
@@ -20,12 +20,12 @@ def render_pptx(doc: Doc, out_path: str, slide_count_hint: int | None = None) ->
         tf = slide.shapes.placeholders[1].text_frame
         tf.clear()
         for block in sec.blocks:
-            if block.kind == "para":
+            if block["kind"] == "para":
                 p = tf.add_paragraph()
-                p.text = block.text
+                p.text = block["text"]
                 p.font.size = Pt(18)
-            elif block.kind == "list":
-                for item in block.items:
+            elif block["kind"] == "list":
+                for item in block["items"]:
                     p = tf.add_paragraph()
                     p.text = f"• {item}"
                     p.level = 1
@@ -1,9 +1,10 @@
 
 from __future__ import annotations
-from openpyxl import Workbook
+from typing import BinaryIO
 from upe.doc_ast import Doc
 
-def render_xlsx(doc: Doc, out_path: str) -> None:
+def render_xlsx(doc: Doc, out_path: str | BinaryIO) -> None:
+    from openpyxl import Workbook
     wb = Workbook()
     ws = wb.active
     ws.title = "Summary"
@@ -12,12 +13,12 @@ def render_xlsx(doc: Doc, out_path: str) -> None:
         ws.append([])
         ws.append([sec.heading])
         for block in sec.blocks:
-            if block.kind == "para":
-                ws.append([block.text])
-            elif block.kind == "list":
-                for item in block.items:
+            if block["kind"] == "para":
+                ws.append([block["text"]])
+            elif block["kind"] == "list":
+                for item in block["items"]:
                     ws.append(["- ", item])
-            elif block.kind == "table":
-                for row in block.rows:
+            elif block["kind"] == "table":
+                for row in block["rows"]:
                     ws.append(row)
     wb.save(out_path)
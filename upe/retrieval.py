@@ -1,34 +1,43 @@
 
 from __future__ import annotations
-import hashlib
+import hashlib, operator
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 
+# hashlib releases the GIL while digesting, so body hashes run in parallel threads
+_hash_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="upe-snapshot")
+
 def _sha256(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+    return hashlib.sha256(s.encode("utf-8"), usedforsecurity=False).hexdigest()
 
 def deterministic_snapshot(docs: List[Dict[str,str]], topK: int) -> List[Dict[str,str]]:
     # docs = [{"id":..., "title":..., "body":...}]
-    docs_sorted = sorted(docs, key=lambda d: (d.get("title",""), d.get("id","")))
-    snap = []
-    for d in docs_sorted[:topK]:
-        snap.append({
-            "id": d["id"],
-            "title": d["title"],
-            "hash": _sha256(d.get("body",""))
-        })
-    return snap
+    # Build the (title, id) keys once; `or ""` keeps None titles/ids comparable
+    keyed = [((d.get("title") or ""), (d.get("id") or ""), d) for d in docs]
+    keyed.sort(key=operator.itemgetter(0, 1))
+    top = [k[2] for k in keyed[:topK]]
+    if len(top) > 1:
+        hashes = list(_hash_pool.map(lambda d: _sha256(d.get("body","")), top))
+    else:
+        hashes = [_sha256(d.get("body","")) for d in top]
+    return [{"id": d.get("id") or "", "title": d.get("title") or "", "hash": h} for d, h in zip(top, hashes)]
 
-def load_from_chromadb(collection_name: str="yafa", topK: int=12) -> List[Dict[str,str]]:
+def load_from_chromadb(collection_name: str="yafa", topK: int=12, query: str | None = None) -> List[Dict[str,str]]:
     try:
         import chromadb  # type: ignore
         client = chromadb.Client()
         col = client.get_or_create_collection(collection_name)
-        # This is a deterministic sample of first N for snapshot; real search can be added later
-        results = col.get(include=["documents","metadatas","ids"])
+        if query:
+            # Let Chroma rank and return only topK instead of materializing the whole collection
+            res = col.query(query_texts=[query], n_results=topK, include=["documents","metadatas"])
+            ids, documents, metadatas = res["ids"][0], res["documents"][0], res["metadatas"][0]
+        else:
+            res = col.get(limit=topK, include=["documents","metadatas"])
+            ids, documents, metadatas = res["ids"], res["documents"], res["metadatas"]
         docs = []
-        for i, doc in enumerate(results.get("documents", [])[:topK]):
-            title = results.get("metadatas", [{}])[i].get("title", f"Doc {i+1}")
-            docs.append({"id": results["ids"][i], "title": title, "body": doc or ""})
+        for i, (doc_id, doc, meta) in enumerate(zip(ids, documents, metadatas)):
+            title = (meta or {}).get("title", f"Doc {i+1}")
+            docs.append({"id": doc_id, "title": title, "body": doc or ""})
         return docs
     except Exception:
         return []
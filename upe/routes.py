@@ -1,10 +1,16 @@
 
 from __future__ import annotations
-import os, time, uuid, json, hashlib, math, random
-from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, HTTPException, Body
-from pydantic import BaseModel
-from openai import OpenAI
+import io, os, time, uuid, json, hashlib, heapq, math, random, asyncio, threading
+import httpx, msgspec, orjson
+from cachetools import LRUCache
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Body, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from openai import AsyncOpenAI
+from upe.rate_limit import RateLimitedClient
 from upe.pabi import PabiInput, PabiOutput
 from upe.gears import gearProfiles
 from upe.prompt_bom import compile_prompt_bom
@@ -13,109 +19,338 @@ from upe.proof_gate import proof_gate
 from upe.format_gate import format_fidelity
 from upe.ledger import Ledger
 from upe.doc_ast import Doc, Section, Para, ListBlock
-from upe.storage import BASE, ensure_dir, write_file, write_json, read_json
+from upe.storage import BASE, ensure_dir, write_file, write_stream, write_json, read_trusted
 from upe.manifest import RunManifest, ArtifactMeta
 from upe.followups import followups_for
 from upe.renderers.pptx_renderer import render_pptx
 from upe.renderers.docx_renderer import render_docx
 from upe.renderers.xlsx_renderer import render_xlsx
 from upe.renderers.pdf_renderer import render_pdf
-from upe.renderers.html_renderer import render_html
+from upe.renderers.html_renderer import iter_html_bytes, write_html
 from upe.validators.pptx_validator import validate_pptx
 from upe.validators.docx_validator import validate_docx
 from upe.validators.xlsx_validator import validate_xlsx
 from upe.validators.pdf_validator import validate_pdf
 from upe.validators.html_validator import validate_html
 from upe.sabi import apply_edit_ops
+from upe.llm_cache import LLMCache
 from upe.schema_transformer import transform_ai_output_to_schema, validate_and_fix_schema
 
 router = APIRouter(prefix="/upe", tags=["UPE"])
 
-def _sha256_bytes(data: bytes) -> str:
-    h = hashlib.sha256(); h.update(data); return h.hexdigest()
+MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+_llm_cache = LLMCache(directory=os.path.join(BASE, ".llm_cache"))
+SEMANTIC_CACHE = os.getenv("UPE_SEMANTIC_CACHE", "0") == "1"
+EMBED_MODEL = os.getenv("UPE_EMBED_MODEL", "text-embedding-3-small")
+# Upper bound on in-flight model calls per worker across all committee fan-outs
+MAX_CONCURRENT_LLM = int(os.getenv("UPE_MAX_CONCURRENT_LLM", "16"))
+BATCH_POLL_S = float(os.getenv("UPE_BATCH_POLL_S", "30"))
 
-def _llm_json(client: OpenAI, model: str, prompt: str, seed: int, temperature: float) -> Dict[str,Any]:
-    # Uses Chat Completions with JSON mode
-    resp = client.chat.completions.create(
+# Built once; compile validates the raw body and serializes its response through these
+_PABI_INPUT = TypeAdapter(PabiInput)
+_PABI_OUTPUT = TypeAdapter(PabiOutput)
+
+_http: Optional[httpx.AsyncClient] = None
+_client: Optional[RateLimitedClient] = None
+
+def _get_client() -> RateLimitedClient:
+    # One pooled HTTP/2 client per worker, created on first use so the app imports without a key
+    global _http, _client
+    if _client is None:
+        http = httpx.AsyncClient(http2=True, timeout=60,
+                                 limits=httpx.Limits(max_connections=1000, max_keepalive_connections=200))
+        # SDK retries cover files/batches/embeddings; chat calls are retried by the wrapper alone
+        _client = RateLimitedClient(AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http, max_retries=2),
+                                    max_concurrent=MAX_CONCURRENT_LLM)
+        _http = http
+    return _client
+
+@router.on_event("shutdown")
+async def _close_client() -> None:
+    global _http, _client
+    if _http is not None:
+        await _http.aclose()
+    _http = _client = None
+
+async def _llm_json(client: RateLimitedClient, model: str, system_prompt: str, user_prompt: str,
+                    seed: int, temperature: float) -> Dict[str,Any]:
+    # Uses Chat Completions with JSON mode; awaited so the event loop keeps serving other requests
+    resp = await client.chat_completion(
         model=model,
         temperature=temperature,
         seed=seed,
         response_format={"type":"json_object"},
-        messages=[{"role":"user","content":prompt}],
+        messages=_messages(system_prompt, user_prompt),
     )
-    content = resp.choices[0].message.content or "{}"
+    return _parse_model_json(resp.choices[0].message.content)
+
+def _messages(system_prompt: str, user_prompt: str) -> List[Dict[str,str]]:
+    # The system message is byte-identical across runs of a cartridge, so it is served from the prefix cache
+    return [{"role":"system","content":system_prompt},{"role":"user","content":user_prompt}]
+
+def _parse_model_json(content: Optional[str]) -> Dict[str,Any]:
     try:
-        return json.loads(content)
-    except Exception:
+        return orjson.loads(content or "{}")
+    except orjson.JSONDecodeError:
         return {"status":"TOOL_ERROR","message":"malformed JSON from model"}
 
+async def _llm_json_batch(client: RateLimitedClient, model: str, system_prompt: str, user_prompt: str,
+                          jobs: List[tuple[int,float]],
+                          on_submit: Optional[Callable[[str, str], Awaitable[None]]] = None) -> List[Dict[str,Any]]:
+    # One Batch API job for all (seed, temperature) pairs; billed at half the interactive rate.
+    # on_submit(batch_id, input_file_id) runs once the job exists, before the (up to 24h) wait.
+    lines = [orjson.dumps({
+        "custom_id": f"C{n}", "method": "POST", "url": "/v1/chat/completions",
+        "body": {"model": model, "temperature": temp, "seed": seed, "response_format": {"type":"json_object"},
+                 "messages": _messages(system_prompt, user_prompt)},
+    }) for n, (seed, temp) in enumerate(jobs)]
+    upload = await client.files.create(file=("committee.jsonl", b"\n".join(lines)), purpose="batch")
+    batch = await client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions",
+                                        completion_window="24h")
+    if on_submit is not None:
+        await on_submit(batch.id, upload.id)
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        await asyncio.sleep(BATCH_POLL_S)
+        batch = await client.batches.retrieve(batch.id)
+    if batch.status != "completed" or not batch.output_file_id:
+        raise HTTPException(502, f"batch {batch.id} ended with status {batch.status}")
+    output = await client.files.content(batch.output_file_id)
+    by_id: Dict[str, Dict[str,Any]] = {}
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        row = orjson.loads(line)
+        choices = ((row.get("response") or {}).get("body") or {}).get("choices") or []
+        by_id[row["custom_id"]] = (_parse_model_json(choices[0]["message"]["content"]) if choices
+                                   else {"status":"TOOL_ERROR","message":"batch request failed"})
+    return [by_id.get(f"C{n}", {"status":"TOOL_ERROR","message":"missing batch result"}) for n in range(len(jobs))]
+
+async def _embed(client: RateLimitedClient, text: str) -> Optional[List[float]]:
+    # Semantic cache lookups are best-effort; a failed embedding just skips that tier
+    try:
+        resp = await client.embeddings.create(model=EMBED_MODEL, input=text)
+        return resp.data[0].embedding
+    except Exception:
+        return None
+
+def _retrieve(gear: Dict[str,Any], query: str) -> tuple[List[Dict[str,str]], str]:
+    docs = load_from_chromadb(topK=gear.get("ragTopK", 6), query=query)
+    snapshot = deterministic_snapshot(docs, gear.get("ragTopK", 6))
+    context = "Sources:\n" + "\n".join([f"{s['id']} {s['hash']}" for s in snapshot])
+    return snapshot, context
+
+def _score_candidate(j: Dict[str,Any], mode: str) -> float:
+    # score heuristic: presence of sections and (for proof) citations count
+    sections = j.get("sections") or []
+    score = 0.5 if isinstance(sections, list) and len(sections) >= 2 else 0.0
+    if mode == "proof":
+        score += min(0.5, 0.1 * len(j.get("citations") or []))
+    return score
+
+# Identical for every run; built once at import
+_RUBRIC = "- Correctness (40%)\n- Completeness (20%)\n- Evidence (20%)\n- Style (10%)\n- Safety (10%)"
+_OUTPUT_SCHEMA_JSON = orjson.dumps({
+    "type":"object","additionalProperties":False,
+    "properties":{
+        "title":{"type":"string"},
+        "sections":{"type":"array","items":{"type":"object","properties":{
+            "id":{"type":"string"},
+            "heading":{"type":"string"},
+            "blocks":{"type":"array","items":{"type":"object"}}
+        },"required":["id","heading","blocks"],"additionalProperties":False}},
+        "citations":{"type":"array","items":{"type":"object","properties":{
+            "id":{"type":"string"},"source_id":{"type":"string"},"quote":{"type":"string"},"confidence":{"type":"number"}
+        },"required":["id","source_id","quote"],"additionalProperties":False}}
+    },
+    "required":["title","sections"]
+}, option=orjson.OPT_INDENT_2).decode()
+_FAILURE_JSON = '{"status":"INSUFFICIENT_CONTEXT","missing":["field"]}'
+
+@lru_cache(maxsize=64)
+def _prompt_digest(text: str) -> str:
+    # The system prompt comes from an lru_cache, so this is a lookup after the first run
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _build_bom(body: PabiInput, gear: Dict[str,Any], *, run_id: str, seed: int, model: str, context: str) -> tuple[str,str]:
+    return compile_prompt_bom(
+        run_id=run_id, cartridge_version="cartridge@1.0.0", seed=seed, model=model, temp=gear["temps"][0],
+        role="Domain Expert", goal=body.goal, context=context,
+        style="Executive, terse, data-first", banlist=["emojis","hyperbole"],
+        tools_json="[]", rubric=_RUBRIC, output_schema=_OUTPUT_SCHEMA_JSON, failure_json=_FAILURE_JSON
+    )
+
+# kind -> (render(doc, path), validate(path) -> (ok, reason), file name)
+RENDERERS = {
+    "pptx": (render_pptx, validate_pptx, "artifact.pptx"),
+    "docx": (render_docx, validate_docx, "artifact.docx"),
+    "xlsx": (render_xlsx, validate_xlsx, "artifact.xlsx"),
+    "pdf": (render_pdf, validate_pdf, "artifact.pdf"),
+    "html": (write_html, validate_html, "artifact.html"),
+}
+SECONDARY_KINDS = ("pdf", "docx", "xlsx")
+
+def _write_artifact(kind: str, doc: Doc, path: str) -> tuple[int,str]:
+    # Render in memory (or stream, for html) and hash in the same pass that writes the file
+    if kind == "html":
+        return write_stream(path, iter_html_bytes(doc))
+    buf = io.BytesIO()
+    RENDERERS[kind][0](doc, buf)
+    return write_stream(path, (buf.getbuffer(),))
+
 @router.get("/health")
 def health():
     return {"status":"ok","component":"upe","storage": BASE}
 
-@router.post("/compile", response_model=PabiOutput)
-def compile_endpoint(body: PabiInput):
+def _pabi_response(out: PabiOutput, status_code: int = 200) -> Response:
+    return Response(content=_PABI_OUTPUT.dump_json(out), status_code=status_code, media_type="application/json")
+
+# The body is parsed by hand, so document it by reference; /compile/stream registers the component
+@router.post("/compile", response_model=PabiOutput, openapi_extra={
+    "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/PabiInput"}}},
+                    "required": True}})
+async def compile_endpoint(request: Request, background_tasks: BackgroundTasks):
+    # Validate straight from bytes instead of json.loads followed by model validation
+    try:
+        body = _PABI_INPUT.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)])
     # 0) Validate gear
     if body.mode not in gearProfiles:
         raise HTTPException(400, f"Unknown mode {body.mode}")
     gear = gearProfiles[body.mode]
     seed = body.seed or random.randint(1, 1_000_000_000)
-    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    run_id = str(uuid.uuid4())
+
+    # Batch jobs can take far longer than an HTTP request, so they always run detached
+    if body.background or gear.get("useBatch"):
+        pending = _pending_manifest(body, run_id, seed)
+        await asyncio.to_thread(write_json, os.path.join(BASE, run_id, "manifest.json"), msgspec.to_builtins(pending))
+        background_tasks.add_task(_compile_in_background, body, gear, run_id, seed, pending)
+        return _pabi_response(PabiOutput(
+            v="1.0.0",
+            bundle={"runInstructions": f"Poll /upe/runs/{run_id} until status is no longer pending", "followups": []},
+            manifestId=run_id, seed=seed, model=MODEL, cartridge="cartridge@1.0.0",
+            status="PENDING"
+        ), status_code=202)
+    return _pabi_response(await _run_compile(body, gear, run_id, seed))
+
+def _pending_manifest(body: PabiInput, run_id: str, seed: int) -> RunManifest:
+    return RunManifest(
+        id=run_id,
+        createdAt=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        request=body.model_dump(),
+        engine={"model": MODEL, "seed": seed, "gear": body.mode},
+        retrieval={}, committee=[], judge={}, docAst={}, artifacts=[], timings={},
+        status="pending"
+    )
+
+def _update_manifest(path: str, fallback: RunManifest, **changes: Any) -> None:
+    # Re-reads the file so fields recorded mid-run (e.g. the batch id) are kept
+    try:
+        current = read_trusted(path, RunManifest)
+    except (OSError, msgspec.DecodeError):
+        current = fallback
+    write_json(path, msgspec.to_builtins(msgspec.structs.replace(current, **changes)))
+
+async def _compile_in_background(body: PabiInput, gear: Dict[str,Any], run_id: str, seed: int,
+                                 pending: RunManifest) -> None:
+    # A completed run rewrites the manifest itself; anything else is recorded on the pending one.
+    # State lives in this worker: if it dies mid-run the manifest stays pending, with the batch
+    # id (when there is one) available to reconcile the paid output.
+    path = os.path.join(BASE, run_id, "manifest.json")
+    try:
+        out = await _run_compile(body, gear, run_id, seed)
+    except HTTPException as e:
+        await asyncio.to_thread(_update_manifest, path, pending, status="failed",
+                                error={"status": e.status_code, "detail": e.detail})
+        return
+    except Exception as e:
+        await asyncio.to_thread(_update_manifest, path, pending, status="failed",
+                                error={"status": 500, "detail": str(e)})
+        return
+    if out.status != "OK":
+        await asyncio.to_thread(_update_manifest, path, pending, status="failed",
+                                error={"status": out.status, "detail": (out.proof or {}).get("judgeNote")})
+
+async def _run_compile(body: PabiInput, gear: Dict[str,Any], run_id: str, seed: int) -> PabiOutput:
+    model = MODEL
+    client = _get_client()
 
     t0 = time.time()
-    run_id = str(uuid.uuid4())
 
-    # 1) Retrieval snapshot
-    docs = load_from_chromadb(topK=gear.get("ragTopK", 6))
-    snapshot = deterministic_snapshot(docs, gear.get("ragTopK", 6))
-    context = "Sources:\n" + "\n".join([f"{s['id']} {s['hash']}" for s in snapshot])
+    # 1) Retrieval snapshot; Chroma runs in a worker thread while the goal is embedded
+    retrieval = asyncio.create_task(asyncio.to_thread(_retrieve, gear, body.goal))
+    embedding = await _embed(client, body.goal) if SEMANTIC_CACHE else None
+    snapshot, context = await retrieval
 
     # 2) Prompt BOM
-    rubric = "- Correctness (40%)\n- Completeness (20%)\n- Evidence (20%)\n- Style (10%)\n- Safety (10%)"
-    output_schema = json.dumps({
-        "type":"object","additionalProperties":False,
-        "properties":{
-            "title":{"type":"string"},
-            "sections":{"type":"array","items":{"type":"object","properties":{
-                "id":{"type":"string"},
-                "heading":{"type":"string"},
-                "blocks":{"type":"array","items":{"type":"object"}}
-            },"required":["id","heading","blocks"],"additionalProperties":False}},
-            "citations":{"type":"array","items":{"type":"object","properties":{
-                "id":{"type":"string"},"source_id":{"type":"string"},"quote":{"type":"string"},"confidence":{"type":"number"}
-            },"required":["id","source_id","quote"],"additionalProperties":False}}
-        },
-        "required":["title","sections"]
-    }, indent=2)
-    failure_json = '{"status":"INSUFFICIENT_CONTEXT","missing":["field"]}'
-    bom = compile_prompt_bom(
-        run_id=run_id, cartridge_version="cartridge@1.0.0", seed=seed, model=model, temp=gear["temps"][0],
-        role="Domain Expert", goal=body.goal, context=context,
-        style="Executive, terse, data-first", banlist=["emojis","hyperbole"],
-        tools_json="[]", rubric=rubric, output_schema=output_schema, failure_json=failure_json
-    )
+    system_prompt, user_prompt = _build_bom(body, gear, run_id=run_id, seed=seed, model=model, context=context)
+    bom = system_prompt + "\n\n" + user_prompt
 
     # 3) Committee/Judge simple implementation (k candidates)
+    # Cache identity is the request rather than the BOM, whose header carries the per-run id
+    # (plus the static system prompt, so a deploy that changes it stops replaying old answers)
+    cache_prompt = {"cartridge": "cartridge@1.0.0", "system": _prompt_digest(system_prompt),
+                    "mode": body.mode, "goal": body.goal, "context": context}
+
+    def _temp(i: int) -> float:
+        return gear["temps"][min(i, len(gear["temps"])-1)]
+
+    def _scope(i: int) -> str:
+        return json.dumps([cache_prompt["cartridge"], cache_prompt["system"], body.mode, context, i])
+
+    def _lookup(i: int) -> Optional[Dict[str,Any]]:
+        return _llm_cache.get(model, cache_prompt, _temp(i), seed=seed + i, embedding=embedding, scope=_scope(i))
+
+    async def _remember(i: int, cand_json: Dict[str,Any]) -> None:
+        if cand_json.get("status") != "TOOL_ERROR":
+            await _llm_cache.aset(model, cache_prompt, _temp(i), cand_json, seed=seed + i, embedding=embedding, scope=_scope(i))
+
+    async def _candidate(i: int) -> Dict[str,Any]:
+        cand_json = _lookup(i)
+        if cand_json is None:
+            cand_json = await _llm_json(client, model, system_prompt, user_prompt, seed + i, _temp(i))
+            await _remember(i, cand_json)
+        return cand_json
+
+    batch_info: Dict[str,Any] = {}
+    if gear.get("useBatch"):
+        results: List[Any] = [_lookup(i) for i in range(gear["k"])]
+        misses = [i for i, r in enumerate(results) if r is None]
+        if misses:
+            async def _record_batch(batch_id: str, input_file_id: str) -> None:
+                batch_info.update(id=batch_id, inputFileId=input_file_id, jobs=[
+                    {"customId": f"C{n}", "candidate": f"C{i+1}", "seed": seed + i, "temperature": _temp(i)}
+                    for n, i in enumerate(misses)])
+                path = os.path.join(BASE, run_id, "manifest.json")
+                if os.path.exists(path):
+                    await asyncio.to_thread(_update_manifest, path, _pending_manifest(body, run_id, seed),
+                                            batch=batch_info)
+            fresh = await _llm_json_batch(client, model, system_prompt, user_prompt,
+                                          [(seed + i, _temp(i)) for i in misses], on_submit=_record_batch)
+            for i, cand_json in zip(misses, fresh):
+                results[i] = cand_json
+                await _remember(i, cand_json)
+    else:
+        # All k candidates are in flight at once; the committee costs ~one round-trip, not k
+        results = await asyncio.gather(*(_candidate(i) for i in range(gear["k"])), return_exceptions=True)
+    if all(isinstance(r, BaseException) for r in results):
+        raise results[0]
     candidates = []
-    for i in range(gear["k"]):
-        cand_json = _llm_json(client, model, bom, seed + i, gear["temps"][min(i, len(gear["temps"])-1)])
-        # score heuristic: presence of sections and (for proof) citations count
-        sections = cand_json.get("sections", [])
-        cites = cand_json.get("citations", [])
-        score = 0.0
-        if isinstance(sections, list) and len(sections) >= 2: score += 0.5
-        if body.mode == "proof": score += min(0.5, 0.1 * len(cites))
-        candidates.append({"id": f"C{i+1}", "json": cand_json, "score": score})
-    candidates.sort(key=lambda c: c["score"], reverse=True)
-    winner = candidates[0]
+    for i, cand_json in enumerate(results):
+        if isinstance(cand_json, BaseException):
+            cand_json = {"status":"TOOL_ERROR","message":str(cand_json)}
+        candidates.append({"id": f"C{i+1}", "json": cand_json, "score": _score_candidate(cand_json, body.mode)})
+    # Only the top two matter (winner + triangulation); candidates stays in generation order for the ledger
+    top = heapq.nlargest(2, candidates, key=lambda c: c["score"])
+    winner = top[0]
     rubric_score = winner["score"]
-    cites_count = len(winner["json"].get("citations", []))
+    cites_count = len(winner["json"].get("citations") or [])
 
     triangulated = True
     if gear.get("triangulate"):
         # simple triangulation: second pass must also have >= 2 sections and at least one citation
-        triangulated = len(candidates) >= 2 and len(candidates[1]["json"].get("sections", [])) >= 2
+        triangulated = len(top) >= 2 and len(top[1]["json"].get("sections") or []) >= 2
 
     # 4) Build Doc AST from winner JSON with schema transformation
     try:
@@ -123,6 +358,7 @@ def compile_endpoint(body: PabiInput):
         transformed_json = transform_ai_output_to_schema(winner["json"])
         validated_json = validate_and_fix_schema(transformed_json)
         
+        # Model output is untrusted: the transformer only renames keys, so types are checked here
         doc = Doc.model_validate({
             "title": validated_json["title"],
             "sections": [
@@ -136,73 +372,26 @@ def compile_endpoint(body: PabiInput):
     # 5) Render artifacts
     run_dir = os.path.join(BASE, run_id)
     ensure_dir(run_dir)
-    produced: list[str] = []
-    artifacts: list[ArtifactMeta] = []
 
     primary = body.artifact.primary
     seconds = body.artifact.secondaries or []
 
-    def add_art(kind: str, path: str):
-        with open(path, "rb") as f:
-            data = f.read()
-        size, sha = len(data), _sha256_bytes(data)
-        artifacts.append(ArtifactMeta(kind=kind, path=path, bytes=size, sha256=sha, primary=(kind==primary)))
-
-    if primary == "pptx":
-        path = os.path.join(run_dir, "artifact.pptx")
-        render_pptx(doc, path, None)
-        ok, reason = validate_pptx(path, 1)
-        if not ok: raise HTTPException(422, f"pptx validator: {reason}")
-        produced.append("pptx"); add_art("pptx", path)
-    elif primary == "docx":
-        path = os.path.join(run_dir, "artifact.docx")
-        render_docx(doc, path)
-        ok, reason = validate_docx(path)
-        if not ok: raise HTTPException(422, f"docx validator: {reason}")
-        produced.append("docx"); add_art("docx", path)
-    elif primary == "xlsx":
-        path = os.path.join(run_dir, "artifact.xlsx")
-        render_xlsx(doc, path)
-        ok, reason = validate_xlsx(path)
-        if not ok: raise HTTPException(422, f"xlsx validator: {reason}")
-        produced.append("xlsx"); add_art("xlsx", path)
-    elif primary == "pdf":
-        path = os.path.join(run_dir, "artifact.pdf")
-        render_pdf(doc, path)
-        ok, reason = validate_pdf(path)
-        if not ok: raise HTTPException(422, f"pdf validator: {reason}")
-        produced.append("pdf"); add_art("pdf", path)
-    elif primary == "html":
-        path = os.path.join(run_dir, "artifact.html")
-        html = render_html(doc)
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(html)
-        ok, reason = validate_html(path)
-        if not ok: raise HTTPException(422, f"html validator: {reason}")
-        produced.append("html"); add_art("html", path)
-    else:
-        raise HTTPException(400, f"Unsupported primary artifact: {primary}")
+    def _render_step(kind: str) -> ArtifactMeta:
+        # Render + validate one artifact; runs in a worker thread
+        _, validate, name = RENDERERS[kind]
+        path = os.path.join(run_dir, name)
+        size, sha = _write_artifact(kind, doc, path)
+        ok, reason = validate(path)
+        if not ok: raise HTTPException(422, f"{kind} validator: {reason}")
+        return ArtifactMeta(kind=kind, path=path, bytes=size, sha256=sha, primary=(kind==primary))
 
-    # secondaries
-    for s in seconds:
-        if s == "pdf":
-            path = os.path.join(run_dir, "artifact.pdf")
-            render_pdf(doc, path)
-            ok, reason = validate_pdf(path)
-            if not ok: raise HTTPException(422, f"pdf validator: {reason}")
-            produced.append("pdf"); add_art("pdf", path)
-        elif s == "docx":
-            path = os.path.join(run_dir, "artifact.docx")
-            render_docx(doc, path)
-            ok, reason = validate_docx(path)
-            if not ok: raise HTTPException(422, f"docx validator: {reason}")
-            produced.append("docx"); add_art("docx", path)
-        elif s == "xlsx":
-            path = os.path.join(run_dir, "artifact.xlsx")
-            render_xlsx(doc, path)
-            ok, reason = validate_xlsx(path)
-            if not ok: raise HTTPException(422, f"xlsx validator: {reason}")
-            produced.append("xlsx"); add_art("xlsx", path)
+    if primary not in RENDERERS:
+        raise HTTPException(400, f"Unsupported primary artifact: {primary}")
+    # Each format is rendered once, even if it is also listed as a secondary;
+    # distinct files let the renders run in parallel
+    wanted = list(dict.fromkeys([primary] + [s for s in seconds if s in SECONDARY_KINDS]))
+    artifacts = list(await asyncio.gather(*(asyncio.to_thread(_render_step, k) for k in wanted)))
+    produced = [a.kind for a in artifacts]
 
     # 6) Gates
     ff_ok, ff_reason = format_fidelity(primary=primary, produced=produced)
@@ -240,10 +429,11 @@ def compile_endpoint(body: PabiInput):
         docAst=doc.model_dump(),
         artifacts=artifacts,
         timings={"totalMs": (time.time()-t0)*1000.0},
-        status="completed"
+        status="completed",
+        batch=batch_info or None
     )
-    ensure_dir(os.path.join(BASE, run_id))
-    write_json(os.path.join(BASE, run_id, "manifest.json"), manifest.model_dump())
+    # The manifest embeds the whole docAst; encode and write it off the event loop
+    await asyncio.to_thread(write_json, os.path.join(BASE, run_id, "manifest.json"), msgspec.to_builtins(manifest))
 
     # 9) Followups
     followups = followups_for(body.goal, body.mode, run_id)
@@ -261,12 +451,62 @@ def compile_endpoint(body: PabiInput):
         status="OK"
     )
 
-@router.get("/runs/{run_id}")
-def get_run(run_id: str):
+@router.post("/compile/stream")
+async def compile_stream(body: PabiInput):
+    # Streams the first committee candidate as server-sent events so interactive clients
+    # see the draft JSON as it is generated. No artifacts or manifest are produced.
+    if body.mode not in gearProfiles:
+        raise HTTPException(400, f"Unknown mode {body.mode}")
+    gear = gearProfiles[body.mode]
+    seed = body.seed or random.randint(1, 1_000_000_000)
+    model = MODEL
+    client = _get_client()
+    _, context = await asyncio.to_thread(_retrieve, gear, body.goal)
+    system_prompt, user_prompt = _build_bom(body, gear, run_id=str(uuid.uuid4()), seed=seed, model=model, context=context)
+
+    async def events():
+        try:
+            stream = await client.chat.completions.create(
+                model=model,
+                temperature=gear["temps"][0],
+                seed=seed,
+                response_format={"type":"json_object"},
+                messages=_messages(system_prompt, user_prompt),
+                stream=True,
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    # JSON-encode each delta so newlines in the payload cannot break SSE framing
+                    yield b"data: " + orjson.dumps({"delta": chunk.choices[0].delta.content}) + b"\n\n"
+            yield b"event: done\ndata: " + orjson.dumps({"seed": seed, "model": model}) + b"\n\n"
+        except Exception as e:
+            yield b"event: error\ndata: " + orjson.dumps({"message": str(e)}) + b"\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# run_id -> (st_mtime_ns, st_size, manifest); entries are revalidated against the file on every hit
+_manifest_cache: LRUCache = LRUCache(maxsize=256)
+_manifest_lock = threading.Lock()
+
+def _get_manifest(run_id: str) -> RunManifest:
+    # Cached manifests are shared between requests; replace them rather than mutating in place
     path = os.path.join(BASE, run_id, "manifest.json")
-    if not os.path.exists(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
         raise HTTPException(404, "run not found")
-    return read_json(path)
+    with _manifest_lock:
+        hit = _manifest_cache.get(run_id)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    manifest = read_trusted(path, RunManifest)
+    with _manifest_lock:
+        _manifest_cache[run_id] = (st.st_mtime_ns, st.st_size, manifest)
+    return manifest
+
+@router.get("/runs/{run_id}")
+def get_run(run_id: str):
+    return msgspec.to_builtins(_get_manifest(run_id))
 
 class FeedbackPayload(BaseModel):
     runId: str
@@ -278,35 +518,29 @@ class FeedbackPayload(BaseModel):
 def feedback(run_id: str, payload: FeedbackPayload):
     # load manifest
     path = os.path.join(BASE, run_id, "manifest.json")
-    if not os.path.exists(path): raise HTTPException(404, "run not found")
-    manifest = read_json(path)
-    doc = Doc.model_validate(manifest["docAst"])
+    manifest = _get_manifest(run_id)
+    # Pending and failed background runs have no document to edit yet
+    if manifest.status != "completed":
+        raise HTTPException(409, f"run is {manifest.status}")
+    doc = Doc.model_validate(manifest.docAst)
     # apply edits
     new_doc = apply_edit_ops(doc, payload.ops or [])
     # re-render primary artifact only
-    primary = manifest["request"]["artifact"]["primary"]
+    primary = manifest.request["artifact"]["primary"]
     run_dir = os.path.join(BASE, run_id)
     produced = []
-    if primary == "pptx":
-        p = os.path.join(run_dir, "artifact.pptx"); render_pptx(new_doc, p); produced.append("pptx")
-    elif primary == "docx":
-        p = os.path.join(run_dir, "artifact.docx"); render_docx(new_doc, p); produced.append("docx")
-    elif primary == "xlsx":
-        p = os.path.join(run_dir, "artifact.xlsx"); render_xlsx(new_doc, p); produced.append("xlsx")
-    elif primary == "pdf":
-        p = os.path.join(run_dir, "artifact.pdf"); render_pdf(new_doc, p); produced.append("pdf")
-    elif primary == "html":
-        p = os.path.join(run_dir, "artifact.html"); 
-        with open(p,"w",encoding="utf-8") as f: f.write(render_html(new_doc)); produced.append("html")
+    if primary in RENDERERS:
+        render, _, name = RENDERERS[primary]
+        render(new_doc, os.path.join(run_dir, name)); produced.append(primary)
     # save updated manifest docAst
-    manifest["docAst"] = new_doc.model_dump()
-    write_json(path, manifest)
+    manifest = msgspec.structs.replace(manifest, docAst=new_doc.model_dump())
+    write_json(path, msgspec.to_builtins(manifest))
+    with _manifest_lock:
+        _manifest_cache.pop(run_id, None)
     return {"status":"OK","touched": [op.get("op") for op in payload.ops]}
 
 @router.get("/runs/{run_id}/suggestions")
 def suggestions(run_id: str):
-    path = os.path.join(BASE, run_id, "manifest.json")
-    if not os.path.exists(path): raise HTTPException(404, "run not found")
-    manifest = read_json(path)
-    sugg = followups_for(manifest["request"]["goal"], manifest["request"]["mode"], run_id)
+    manifest = _get_manifest(run_id)
+    sugg = followups_for(manifest.request["goal"], manifest.request["mode"], run_id)
     return {"suggestions": sugg}
@@ -4,19 +4,24 @@ from typing import List, Dict, Any
 from upe.doc_ast import Doc, Section, Para, ListBlock, Table, Chart
 
 def apply_edit_ops(doc: Doc, ops: List[Dict[str,Any]]) -> Doc:
-    # Mutates a copy of the doc and returns it
-    import copy
-    ndoc = copy.deepcopy(doc)
+    # Returns a new doc; only the sections and blocks an op touches are copied,
+    # everything else is shared with the input
+    ndoc = doc.model_copy(update={"sections": list(doc.sections)})
+    # Lowercased headings, kept parallel to ndoc.sections
+    lowered = [s.heading.lower() for s in ndoc.sections]
     for op in ops:
         if op.get("op") == "remove":
             target = op.get("target","").lower()
-            ndoc.sections = [s for s in ndoc.sections if s.heading.lower() != target]
+            keep = [i for i, h in enumerate(lowered) if h != target]
+            ndoc.sections = [ndoc.sections[i] for i in keep]
+            lowered = [lowered[i] for i in keep]
         elif op.get("op") == "focus":
             # Add a bullet under the first section mentioning topic
             topic = op.get("topic","")
             if ndoc.sections:
-                blk = ListBlock(items=[f"Focus on: {topic}"])
-                ndoc.sections[0].blocks.append(blk)
+                blk = ListBlock(kind="list", items=[f"Focus on: {topic}"])
+                first = ndoc.sections[0]
+                ndoc.sections[0] = first.model_copy(update={"blocks": [*first.blocks, blk]})
         elif op.get("op") == "rewrite":
             target = op.get("target")
             to = op.get("to","")
@@ -26,11 +31,13 @@ def apply_edit_ops(doc: Doc, ops: List[Dict[str,Any]]) -> Doc:
         elif op.get("op") == "limit":
             section = op.get("section","").lower()
             max_words = int(op.get("max_words", 200))
-            for s in ndoc.sections:
-                if s.heading.lower() == section:
-                    for b in s.blocks:
-                        if hasattr(b, "text"):
-                            words = b.text.split()
+            for i, (s, h) in enumerate(zip(ndoc.sections, lowered)):
+                if h == section:
+                    blocks = list(s.blocks)
+                    for j, b in enumerate(blocks):
+                        if "text" in b:
+                            words = b["text"].split()
                             if len(words) > max_words:
-                                b.text = " ".join(words[:max_words])
+                                blocks[j] = {**b, "text": " ".join(words[:max_words])}
+                    ndoc.sections[i] = s.model_copy(update={"blocks": blocks})
     return ndoc
@@ -2,6 +2,34 @@ from __future__ import annotations
 from typing import Dict, Any, List
 import json
 
+def _to_para(block: Dict[str, Any]) -> Dict[str, Any]:
+    return {"kind": "para", "text": block.get("content", block.get("text", ""))}
+
+def _to_list(block: Dict[str, Any]) -> Dict[str, Any]:
+    return {"kind": "list", "items": block.get("items", block.get("content", []))}
+
+def _to_table(block: Dict[str, Any]) -> Dict[str, Any]:
+    return {"kind": "table", "rows": block.get("rows", block.get("content", []))}
+
+def _to_chart(block: Dict[str, Any]) -> Dict[str, Any]:
+    return {"kind": "chart", "spec": block.get("spec", block.get("content", {}))}
+
+def _to_para_default(block: Dict[str, Any]) -> Dict[str, Any]:
+    # Unknown types become paragraphs; content is coerced since it may not be a string
+    return {"kind": "para", "text": str(block.get("content", block.get("text", "")))}
+
+# AI block "type" -> transform producing the schema block
+_BLOCK_TRANSFORMS = {
+    "text": _to_para,
+    "list": _to_list,
+    "table": _to_table,
+    "chart": _to_chart,
+}
+
+def transform_block(block: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform a single block from AI format to schema format."""
+    return _BLOCK_TRANSFORMS.get(block.get("type", ""), _to_para_default)(block)
+
 def transform_ai_output_to_schema(ai_output: Dict[str, Any]) -> Dict[str, Any]:
     """
     Transform AI output from type-based format to kind-based format expected by the schema.
@@ -10,45 +38,6 @@ def transform_ai_output_to_schema(ai_output: Dict[str, Any]) -> Dict[str, Any]:
     Expected: {"kind": "para", "text": "..."}
     """
     
-    def transform_block(block: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform a single block from AI format to schema format."""
-        if not isinstance(block, dict):
-            return block
-            
-        # Handle different block types
-        block_type = block.get("type", "")
-        
-        if block_type == "text":
-            # Transform text blocks to paragraph blocks
-            return {
-                "kind": "para",
-                "text": block.get("content", block.get("text", ""))
-            }
-        elif block_type == "list":
-            # Transform list blocks
-            return {
-                "kind": "list",
-                "items": block.get("items", block.get("content", []))
-            }
-        elif block_type == "table":
-            # Transform table blocks
-            return {
-                "kind": "table",
-                "rows": block.get("rows", block.get("content", []))
-            }
-        elif block_type == "chart":
-            # Transform chart blocks
-            return {
-                "kind": "chart",
-                "spec": block.get("spec", block.get("content", {}))
-            }
-        else:
-            # Default to paragraph if type is unknown
-            return {
-                "kind": "para",
-                "text": str(block.get("content", block.get("text", "")))
-            }
-    
     def transform_section(section: Dict[str, Any]) -> Dict[str, Any]:
         """Transform a section with its blocks."""
         if not isinstance(section, dict):
@@ -56,7 +45,7 @@ def transform_ai_output_to_schema(ai_output: Dict[str, Any]) -> Dict[str, Any]:
             
         blocks = section.get("blocks", [])
         if isinstance(blocks, list):
-            transformed_blocks = [transform_block(block) for block in blocks]
+            transformed_blocks = [transform_block(block) if isinstance(block, dict) else block for block in blocks]
         else:
             transformed_blocks = []
             
@@ -1,27 +1,42 @@
 
 from __future__ import annotations
-import os, json, hashlib
-from typing import Dict, Any, Tuple
+import os, hashlib
+import msgspec, orjson
+from typing import Dict, Any, Iterable, Tuple, Type, TypeVar
+
+S = TypeVar("S", bound=msgspec.Struct)
 
 BASE = os.getenv("YAFA_STORAGE_DIR", "/app/data/upe")
 
 def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
-def write_file(path: str, data: bytes) -> Tuple[int,str]:
+def write_stream(path: str, chunks: Iterable[bytes]) -> Tuple[int,str]:
+    # Hash while writing so large artifacts never need a second full-size buffer
     ensure_dir(os.path.dirname(path))
-    with open(path, "wb") as f:
-        f.write(data)
-    size = os.path.getsize(path)
     h = hashlib.sha256()
-    h.update(data)
+    size = 0
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            mv = memoryview(chunk)
+            f.write(mv)
+            h.update(mv)
+            size += len(mv)
     return size, h.hexdigest()
 
+def write_file(path: str, data: bytes) -> Tuple[int,str]:
+    return write_stream(path, (data,))
+
 def write_json(path: str, obj: Dict[str,Any]) -> None:
     ensure_dir(os.path.dirname(path))
-    with open(path, "w") as f:
-        json.dump(obj, f, indent=2)
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
 
 def read_json(path: str) -> Dict[str,Any]:
-    with open(path, "r") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+def read_trusted(path: str, struct_cls: Type[S]) -> S:
+    # For files we wrote ourselves: decode and type-check straight from bytes
+    with open(path, "rb") as f:
+        return msgspec.json.decode(f.read(), type=struct_cls)
@@ -3,6 +3,10 @@ from __future__ import annotations
 import os
 
 def validate_html(path: str) -> tuple[bool,str]:
-    if not os.path.exists(path) or os.path.getsize(path) == 0:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (False, "empty_html")
+    if st.st_size == 0:
         return (False, "empty_html")
     return (True, "ok")
@@ -4,7 +4,11 @@ import os
 
 def validate_pdf(path: str) -> tuple[bool,str]:
     # A minimal check: non-empty bytes and starts with %PDF
-    if not os.path.exists(path) or os.path.getsize(path) == 0:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return (False, "empty_pdf")
+    if st.st_size == 0:
         return (False, "empty_pdf")
     with open(path, "rb") as f:
         head = f.read(4)
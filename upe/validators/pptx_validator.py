@@ -1,9 +1,12 @@
 
 from __future__ import annotations
-from pptx import Presentation
 
 def validate_pptx(path: str, min_slides: int = 1) -> tuple[bool,str]:
-    prs = Presentation(path)
-    if len(prs.slides) < min_slides:
+    from pptx import Presentation
+    # python-pptx has no read-only mode; own the file handle so the zip is released promptly
+    with open(path, "rb") as f:
+        prs = Presentation(f)
+        slide_count = len(prs.slides)
+    if slide_count < min_slides:
         return (False, "too_few_slides")
     return (True, "ok")
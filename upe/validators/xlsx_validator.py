@@ -1,9 +1,13 @@
 
 from __future__ import annotations
-from openpyxl import load_workbook
 
 def validate_xlsx(path: str) -> tuple[bool,str]:
-    wb = load_workbook(path)
-    if not wb.sheetnames:
-        return (False, "no_sheets")
+    from openpyxl import load_workbook
+    # read_only only parses the workbook index, not every sheet's cells
+    wb = load_workbook(path, read_only=True, keep_links=False)
+    try:
+        if not wb.sheetnames:
+            return (False, "no_sheets")
+    finally:
+        wb.close()
     return (True, "ok")